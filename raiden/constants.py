@@ -12,6 +12,7 @@
     BlockHash,
     BlockNumber,
     ChainID,
+    FeeAmount,
     Literal,
     Locksroot,
     RaidenDBVersion,
@@ -110,6 +111,7 @@ class ServerListType(Enum):
 LOCKSROOT_OF_NO_LOCKS = Locksroot(keccak(b""))
 EMPTY_LOCKSROOT = Locksroot(bytes(32))
 ZERO_TOKENS = TokenAmount(0)
+ZERO_FEE = FeeAmount(0)
 
 ABSENT_SECRET = Secret(b"")
 
@@ -8,6 +8,8 @@
 import click
 import gevent
 import structlog
+from cachetools import LRUCache, cached
+from cachetools.keys import hashkey
 from eth_utils import decode_hex, to_canonical_address, to_hex
 from requests.exceptions import RequestException
 from requests.sessions import Session
@@ -86,6 +88,16 @@ class PFSConfig:
     max_paths: int
 
 
+@dataclass(frozen=True)
+class PFSRequest:
+    token_network_address: TokenNetworkAddress
+    one_to_n_address: OneToNAddress
+    route_from: InitiatorAddress
+    route_to: TargetAddress
+    value: PaymentAmount
+    pfs_wait_for_block: BlockNumber
+
+
 @dataclass
 class IOU:
     sender: Address
@@ -406,6 +418,29 @@ def check_pfs_for_production(
         )
 
 
+def last_iou_request_cache_key(  # pylint: disable=unused-argument
+    privkey: bytes, sender: Address, receiver: Address, timestamp: str
+) -> Tuple[Any, ...]:
+    # Keep the private key out of the cache, the sender is derived from it anyway
+    return hashkey(sender, receiver, timestamp)
+
+
+last_iou_request_cache: LRUCache = LRUCache(16)
+
+
+@cached(cache=last_iou_request_cache, key=last_iou_request_cache_key, lock=gevent.lock.Semaphore())
+def sign_last_iou_request(
+    privkey: bytes, sender: Address, receiver: Address, timestamp: str
+) -> str:
+    """Sign the request for the last IOU.
+
+    The timestamp has a resolution of one second, so path requests done in a
+    burst can reuse the signature instead of signing again.
+    """
+    signature_data = sender + receiver + Web3.toBytes(text=timestamp)
+    return to_hex(LocalSigner(privkey).sign(signature_data))
+
+
 def get_last_iou(
     url: str,
     token_network_address: TokenNetworkAddress,
@@ -415,8 +450,7 @@ def get_last_iou(
 ) -> Optional[IOU]:
 
     timestamp = datetime.utcnow().isoformat(timespec="seconds")
-    signature_data = sender + receiver + Web3.toBytes(text=timestamp)
-    signature = to_hex(LocalSigner(privkey).sign(signature_data))
+    signature = sign_last_iou_request(privkey, sender, receiver, timestamp)
 
     try:
         response = session.get(
@@ -540,6 +574,23 @@ def create_current_iou(
         return update_iou(iou=latest_iou, privkey=privkey, added_amount=added_amount)
 
 
+def decode_path_address(address: str) -> Address:
+    """Convert a hex encoded address from a PFS path to its canonical form.
+
+    The paths can be long, so ``bytes.fromhex`` is used directly instead of
+    ``to_canonical_address``.
+    """
+    if len(address) != 42 or not address.startswith("0x"):
+        raise ValueError(f"Invalid address in path: {address}")
+
+    # fromhex skips whitespace, so the length must be checked on the result
+    decoded = bytes.fromhex(address[2:])
+    if len(decoded) != 20:
+        raise ValueError(f"Invalid address in path: {address}")
+
+    return Address(decoded)
+
+
 def post_pfs_paths(
     url: str, token_network_address: TokenNetworkAddress, payload: Dict[str, Any]
 ) -> Tuple[List[Dict[str, Any]], UUID]:
@@ -570,7 +621,7 @@ def post_pfs_paths(
 
     try:
         response_json = get_response_json(response)
-        return response_json["result"], UUID(response_json["feedback_token"])
+        result, feedback_token = response_json["result"], UUID(response_json["feedback_token"])
     except KeyError:
         raise ServiceRequestFailed(
             "Answer from Pathfinding Service not understood ('result' field missing)",
@@ -582,6 +633,16 @@ def post_pfs_paths(
             dict(response_text=response.text, exc_info=True),
         )
 
+    try:
+        for path_object in result:
+            path_object["path"] = [decode_path_address(node) for node in path_object["path"]]
+    except (KeyError, TypeError, ValueError):
+        raise ServiceRequestFailed(
+            "Pathfinding Service returned an invalid path", dict(response=response_json)
+        )
+
+    return result, feedback_token
+
 
 def query_paths(
     pfs_config: PFSConfig,
@@ -610,7 +671,12 @@ def query_paths(
     offered_fee = pfs_config.info.price
     scrap_existing_iou = False
 
-    current_info = get_pfs_info(pfs_config.info.url)
+    # The confirmed block of the PFS only increases, so there is no need to
+    # ask the PFS if the last known one is already recent enough
+    current_info = pfs_config.info
+    if current_info.confirmed_block_number < pfs_wait_for_block:
+        current_info = get_pfs_info(pfs_config.info.url)
+
     while current_info.confirmed_block_number < pfs_wait_for_block:
         log.info(
             "Waiting for PFS to reach target confirmed block number",
@@ -695,6 +761,54 @@ def query_paths(
     return list(), None
 
 
+def query_paths_batch(
+    pfs_config: PFSConfig,
+    our_address: Address,
+    privkey: PrivateKey,
+    current_block_number: BlockNumber,
+    chain_id: ChainID,
+    path_requests: List[PFSRequest],
+) -> List[Tuple[List[Dict[str, Any]], Optional[UUID]]]:
+    """Query paths from the PFS for multiple requests at once.
+
+    The requests are started concurrently, but only waiting for the PFS to
+    reach the required block overlaps. The IOU handling and the /paths request
+    are done while holding ``iou_semaphore``, so they still happen one request
+    at a time. Results are returned in the order of ``path_requests``, if any
+    of the requests failed its exception is raised.
+    """
+
+    def query(path_request: PFSRequest) -> Tuple[List[Dict[str, Any]], Optional[UUID]]:
+        return query_paths(
+            pfs_config=pfs_config,
+            our_address=our_address,
+            privkey=privkey,
+            current_block_number=current_block_number,
+            token_network_address=path_request.token_network_address,
+            one_to_n_address=path_request.one_to_n_address,
+            chain_id=chain_id,
+            route_from=path_request.route_from,
+            route_to=path_request.route_to,
+            value=path_request.value,
+            pfs_wait_for_block=path_request.pfs_wait_for_block,
+        )
+
+    # Don't pay for a greenlet if there is nothing to overlap with
+    if len(path_requests) == 1:
+        return [query(path_requests[0])]
+
+    greenlets = []
+    try:
+        for path_request in path_requests:
+            greenlets.append(gevent.spawn(query, path_request))
+        gevent.joinall(greenlets, raise_error=True)
+        return [greenlet.get() for greenlet in greenlets]
+    finally:
+        # Nobody reads the results anymore if the caller is killed or a
+        # request failed, don't keep paying the PFS for them
+        gevent.killall(greenlets)
+
+
 def post_pfs_feedback(
     routing_mode: RoutingMode,
     pfs_config: PFSConfig,
@@ -826,7 +826,11 @@ def on_raiden_events(
     def handle_routefailed(
         raiden: "RaidenService", route_failed_event: EventRouteFailed
     ) -> None:  # pragma: no unittest
-        feedback_token = raiden.route_to_feedback_token.get(tuple(route_failed_event.route))
+        # Don't hand out the failed route again for a retry within the same block
+        raiden.pfs_routes_cache.invalidate_route(route_failed_event.route)
+
+        # The feedback for a route is only sent once per PFS answer
+        feedback_token = raiden.route_to_feedback_token.pop(tuple(route_failed_event.route), None)
         pfs_config = raiden.config.pfs_config
 
         if feedback_token and pfs_config:
@@ -849,8 +853,8 @@ def handle_routefailed(
     def handle_paymentsentsuccess(
         raiden: "RaidenService", payment_sent_success_event: EventPaymentSentSuccess
     ) -> None:  # pragma: no unittest
-        feedback_token = raiden.route_to_feedback_token.get(
-            tuple(payment_sent_success_event.route)
+        feedback_token = raiden.route_to_feedback_token.pop(
+            tuple(payment_sent_success_event.route), None
         )
         pfs_config = raiden.config.pfs_config
 
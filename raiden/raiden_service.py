@@ -219,6 +219,7 @@ def initiator_init(
             previous_address=None,
             pfs_config=raiden.config.pfs_config,
             privkey=raiden.privkey,
+            pfs_routes_cache=raiden.pfs_routes_cache,
         )
 
         # Only prepare feedback when token is available
@@ -430,6 +431,7 @@ def __init__(
 
         # A list is not hashable, so use tuple as key here
         self.route_to_feedback_token: Dict[Tuple[Address, ...], UUID] = dict()
+        self.pfs_routes_cache = routing.PFSRoutesCache()
 
         # Flag used to skip the processing of all Raiden events during the
         # startup.
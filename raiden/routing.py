@@ -1,25 +1,30 @@
+from itertools import chain
 from uuid import UUID
 
+import gevent.lock
 import structlog
-from eth_utils import to_canonical_address
 
+from raiden.constants import ZERO_FEE
 from raiden.exceptions import ServiceRequestFailed
 from raiden.messages.metadata import RouteMetadata
-from raiden.network.pathfinding import PFSConfig, query_paths
+from raiden.network.pathfinding import PFSConfig, PFSRequest, query_paths_batch
 from raiden.transfer import channel, views
 from raiden.transfer.state import ChainState, ChannelState, RouteState
 from raiden.utils.formatting import to_checksum_address
 from raiden.utils.typing import (
     Address,
     BlockNumber,
-    FeeAmount,
+    ChannelID,
+    Dict,
     InitiatorAddress,
+    Iterable,
     List,
     OneToNAddress,
     Optional,
     PaymentAmount,
     PaymentWithFeeAmount,
     PrivateKey,
+    Set,
     TargetAddress,
     TokenNetworkAddress,
     Tuple,
@@ -27,6 +32,48 @@
 
 log = structlog.get_logger(__name__)
 
+PFSRoutesCacheKey = Tuple[
+    TokenNetworkAddress, InitiatorAddress, TargetAddress, Optional[Address], PaymentAmount
+]
+
+
+class PFSRoutesCache:
+    """Routes received from the PFS, reused for identical requests.
+
+    Entries are only valid within the block they were requested in, the cache
+    is dropped as soon as a request for a different block comes in. Entries
+    containing a route that failed are dropped too, so a retry asks the PFS
+    again.
+    """
+
+    def __init__(self) -> None:
+        self.block_number = BlockNumber(0)
+        self.routes: Dict[PFSRoutesCacheKey, List[RouteState]] = dict()
+        self.lock = gevent.lock.Semaphore()
+
+    def get(self, key: PFSRoutesCacheKey, block_number: BlockNumber) -> Optional[List[RouteState]]:
+        with self.lock:
+            if block_number != self.block_number:
+                return None
+            return self.routes.get(key)
+
+    def set(
+        self, key: PFSRoutesCacheKey, block_number: BlockNumber, routes: List[RouteState]
+    ) -> None:
+        with self.lock:
+            if block_number != self.block_number:
+                self.routes.clear()
+                self.block_number = block_number
+            self.routes[key] = list(routes)
+
+    def invalidate_route(self, route: List[Address]) -> None:
+        with self.lock:
+            self.routes = {
+                key: routes
+                for key, routes in self.routes.items()
+                if all(route_state.route != route for route_state in routes)
+            }
+
 
 def get_best_routes(
     chain_state: ChainState,
@@ -38,6 +85,7 @@ def get_best_routes(
     previous_address: Optional[Address],
     pfs_config: Optional[PFSConfig],
     privkey: PrivateKey,
+    pfs_routes_cache: Optional[PFSRoutesCache] = None,
 ) -> Tuple[Optional[str], List[RouteState], Optional[UUID]]:
 
     token_network = views.get_token_network_by_address(chain_state, token_network_address)
@@ -48,32 +96,54 @@ def get_best_routes(
     #   available.
     # - There will be no mediation fees
     # - The transfer will be faster
-    if Address(to_address) in token_network.partneraddresses_to_channelidentifiers.keys():
-        for channel_id in token_network.partneraddresses_to_channelidentifiers[
-            Address(to_address)
-        ]:
-            channel_state = token_network.channelidentifiers_to_channels[channel_id]
-
-            # direct channels don't have fees
-            payment_with_fee_amount = PaymentWithFeeAmount(amount)
+    partner_address = Address(to_address)
+    channel_ids = token_network.partneraddresses_to_channelidentifiers.get(partner_address)
+    if channel_ids:
+        channels = token_network.channelidentifiers_to_channels
+        # direct channels don't have fees
+        payment_with_fee_amount = PaymentWithFeeAmount(amount)
+
+        # The token network tracks the opened channel with the highest
+        # capacity, the other channels only have to be checked if it can't be
+        # used for this transfer
+        preferred_channel_id = token_network.partneraddresses_to_preferred_channelidentifier.get(
+            partner_address
+        )
+        candidate_ids: Iterable[ChannelID] = channel_ids
+        if preferred_channel_id is not None:
+            candidate_ids = chain(
+                [preferred_channel_id],
+                (channel_id for channel_id in channel_ids if channel_id != preferred_channel_id),
+            )
+
+        for channel_id in candidate_ids:
+            channel_state = channels[channel_id]
+
+            # Closed and settling channels are frequent among the channels
+            # to a partner, skip them before doing the full usability check
+            if channel.get_status(channel_state) != ChannelState.STATE_OPENED:
+                continue
+
             is_usable = channel.is_channel_usable_for_new_transfer(
                 channel_state, payment_with_fee_amount, None
             )
 
             if is_usable is channel.ChannelUsability.USABLE:
                 direct_route = RouteState(
-                    route=[Address(from_address), Address(to_address)],
-                    estimated_fee=FeeAmount(0),
+                    route=[Address(from_address), partner_address],
+                    estimated_fee=ZERO_FEE,
                 )
                 return None, [direct_route], None
 
-    latest_channel_opened_at = 0
-    for channel_state in token_network.channelidentifiers_to_channels.values():
-        latest_channel_opened_at = max(
-            latest_channel_opened_at, channel_state.open_transaction.finished_block_number
-        )
-
     if pfs_config is not None and one_to_n_address is not None:
+        cache_key = (token_network_address, from_address, to_address, previous_address, amount)
+        if pfs_routes_cache is not None:
+            cached_routes = pfs_routes_cache.get(cache_key, chain_state.block_number)
+            if cached_routes is not None:
+                # The feedback for these routes is sent with the first answer's token
+                log.debug("Reusing route(s) from PFS", routes=cached_routes)
+                return None, list(cached_routes), None
+
         pfs_error_msg, pfs_routes, pfs_feedback_token = get_best_routes_pfs(
             chain_state=chain_state,
             token_network_address=token_network_address,
@@ -84,7 +154,7 @@ def get_best_routes(
             previous_address=previous_address,
             pfs_config=pfs_config,
             privkey=privkey,
-            pfs_wait_for_block=BlockNumber(latest_channel_opened_at),
+            pfs_wait_for_block=token_network.latest_channel_opened_at,
         )
 
         if not pfs_error_msg:
@@ -96,6 +166,8 @@ def get_best_routes(
             log.info(
                 "Received route(s) from PFS", routes=pfs_routes, feedback_token=pfs_feedback_token
             )
+            if pfs_routes_cache is not None:
+                pfs_routes_cache.set(cache_key, chain_state.block_number, pfs_routes)
             return pfs_error_msg, pfs_routes, pfs_feedback_token
 
         log.warning(
@@ -122,18 +194,22 @@ def get_best_routes_pfs(
     pfs_wait_for_block: BlockNumber,
 ) -> Tuple[Optional[str], List[RouteState], Optional[UUID]]:
     try:
-        pfs_routes, feedback_token = query_paths(
+        [(pfs_routes, feedback_token)] = query_paths_batch(
             pfs_config=pfs_config,
             our_address=chain_state.our_address,
             privkey=privkey,
             current_block_number=chain_state.block_number,
-            token_network_address=token_network_address,
-            one_to_n_address=one_to_n_address,
             chain_id=chain_state.chain_id,
-            route_from=from_address,
-            route_to=to_address,
-            value=amount,
-            pfs_wait_for_block=pfs_wait_for_block,
+            path_requests=[
+                PFSRequest(
+                    token_network_address=token_network_address,
+                    one_to_n_address=one_to_n_address,
+                    route_from=from_address,
+                    route_to=to_address,
+                    value=amount,
+                    pfs_wait_for_block=pfs_wait_for_block,
+                )
+            ],
         )
     except ServiceRequestFailed as e:
         log_message = ("PFS: " + e.args[0]) if e.args[0] else None
@@ -141,25 +217,20 @@ def get_best_routes_pfs(
         log.warning("An error with the path request occurred", log_message=log_message, **log_info)
         return log_message, [], None
 
-    paths = []
-    for path_object in pfs_routes:
-        path = path_object["path"]
-        estimated_fee = path_object["estimated_fee"]
-        canonical_path = [to_canonical_address(node) for node in path]
-
-        # get the second entry, as the first one is the node itself
-        # also needs to be converted to canonical representation
-        partner_address = canonical_path[1]
-
-        # don't route back
-        if partner_address == previous_address:
-            continue
+    # Many routes share the same first hop, look up and check each partner's
+    # channel once. The partner is the second entry of a path, the first one
+    # is the node itself. Routes going back to the previous hop are ignored.
+    partner_addresses = {
+        path_object["path"][1]
+        for path_object in pfs_routes
+        if len(path_object["path"]) >= 2 and path_object["path"][1] != previous_address
+    }
+    token_network = views.get_token_network_by_address(chain_state, token_network_address)
+    assert token_network, "The token network must be validated and exist."
 
-        channel_state = views.get_channelstate_by_token_network_and_partner(
-            chain_state=chain_state,
-            token_network_address=token_network_address,
-            partner_address=partner_address,
-        )
+    usable_partners: Set[Address] = set()
+    for partner_address in partner_addresses:
+        channel_state = views.get_channelstate_by_partner(token_network, partner_address)
 
         if not channel_state:
             continue
@@ -174,12 +245,13 @@ def get_best_routes_pfs(
             )
             continue
 
-        paths.append(
-            RouteState(
-                route=canonical_path,
-                estimated_fee=estimated_fee,
-            )
-        )
+        usable_partners.add(partner_address)
+
+    paths = [
+        RouteState(route=path_object["path"], estimated_fee=path_object["estimated_fee"])
+        for path_object in pfs_routes
+        if len(path_object["path"]) >= 2 and path_object["path"][1] in usable_partners
+    ]
 
     return None, paths, feedback_token
 
@@ -194,23 +266,32 @@ def resolve_routes(
     TODO: We don't have ``forward_channel_id``, anymore. Does this function still make sense?
     """
 
+    # Parallel routes frequently go through the same partner
+    partner_addresses = {
+        route_metadata.route[1] for route_metadata in routes if len(route_metadata.route) >= 2
+    }
+    token_network = views.get_token_network_by_address(chain_state, token_network_address)
+    if token_network is None:
+        return []
+
+    partner_channels = {
+        partner_address: views.get_channelstate_by_partner(token_network, partner_address)
+        for partner_address in partner_addresses
+    }
+
     resolvable = []
     for route_metadata in routes:
         if len(route_metadata.route) < 2:
             continue
 
-        channel_state = views.get_channelstate_by_token_network_and_partner(
-            chain_state=chain_state,
-            token_network_address=token_network_address,
-            partner_address=route_metadata.route[1],
-        )
+        channel_state = partner_channels.get(route_metadata.route[1])
 
         if channel_state is not None:
             resolvable.append(
                 RouteState(
                     route=route_metadata.route,
                     # This is only used in the mediator, so fees are set to 0
-                    estimated_fee=FeeAmount(0),
+                    estimated_fee=ZERO_FEE,
                 )
             )
     return resolvable
@@ -375,7 +375,7 @@ def test_mediated_transfer_calls_pfs(
     )
     assert token_network_address, "Fixture token_addresses don't have correspoding token_network"
 
-    with patch("raiden.routing.query_paths", return_value=([], None)) as patched:
+    with patch("raiden.routing.query_paths_batch", return_value=[([], None)]) as patched:
 
         app0.mediated_transfer_async(
             token_network_address=token_network_address,
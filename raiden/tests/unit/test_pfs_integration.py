@@ -1,6 +1,7 @@
 import time
 from copy import copy
 from dataclasses import replace
+from datetime import datetime
 from unittest.mock import Mock, call, patch
 from uuid import UUID, uuid4
 
@@ -18,20 +19,25 @@
     PFSConfig,
     PFSError,
     PFSInfo,
+    PFSRequest,
     get_last_iou,
     make_iou,
     post_pfs_feedback,
+    post_pfs_paths,
     query_paths,
+    query_paths_batch,
     session,
     update_iou,
 )
-from raiden.routing import get_best_routes
+from raiden.routing import PFSRoutesCache, get_best_routes
 from raiden.tests.utils import factories
 from raiden.tests.utils.mocks import mocked_failed_response, mocked_json_response
+from raiden.transfer import channel
 from raiden.transfer.state import NettingChannelState, NetworkState, TokenNetworkState
 from raiden.utils import typing
 from raiden.utils.formatting import to_checksum_address
 from raiden.utils.keys import privatekey_to_address
+from raiden.utils.signer import LocalSigner
 from raiden.utils.typing import (
     Address,
     Any,
@@ -135,6 +141,7 @@ def get_best_routes_with_iou_request_mocked(
     to_address,
     amount,
     iou_json_data=None,
+    pfs_routes_cache=None,
 ):
     def iou_side_effect(*args, **kwargs):
         if args[0].endswith("/info"):
@@ -179,6 +186,7 @@ def iou_side_effect(*args, **kwargs):
             previous_address=None,
             pfs_config=PFS_CONFIG,
             privkey=PRIVKEY,
+            pfs_routes_cache=pfs_routes_cache,
         )
         assert_checksum_address_in_url(patched.call_args[0][0])
         return best_routes, feedback_token
@@ -247,6 +255,61 @@ def test_routing_mocked_pfs_happy_path(happy_path_fixture, one_to_n_address, our
     assert iou["expiration_block"] <= latest_expected_expiration
 
 
+def test_routing_mocked_pfs_routes_are_cached_per_block(
+    happy_path_fixture, one_to_n_address, our_address
+):
+    addresses, chain_state, _, response, token_network_state = happy_path_fixture
+    _, address2, _, address4 = addresses
+    pfs_routes_cache = PFSRoutesCache()
+
+    def request_routes():
+        return get_best_routes_with_iou_request_mocked(
+            chain_state=chain_state,
+            token_network_state=token_network_state,
+            one_to_n_address=one_to_n_address,
+            from_address=our_address,
+            to_address=address4,
+            amount=50,
+            pfs_routes_cache=pfs_routes_cache,
+        )
+
+    def request_cached_routes():
+        _, routes, feedback_token = get_best_routes(
+            chain_state=chain_state,
+            token_network_address=token_network_state.address,
+            one_to_n_address=one_to_n_address,
+            from_address=our_address,
+            to_address=address4,
+            amount=PaymentAmount(50),
+            previous_address=None,
+            pfs_config=PFS_CONFIG,
+            privkey=PRIVKEY,
+            pfs_routes_cache=pfs_routes_cache,
+        )
+        return routes, feedback_token
+
+    with patch.object(session, "post", return_value=response) as patched:
+        routes, feedback_token = request_routes()
+        assert patched.call_count == 1
+        assert feedback_token == DEFAULT_FEEDBACK_TOKEN
+
+        # The second request within the same block must not reach the PFS, and
+        # the feedback is only sent for the first one
+        routes, feedback_token = request_cached_routes()
+        assert patched.call_count == 1
+        assert routes[0].next_hop_address == address2
+        assert feedback_token is None
+
+        # A failed route must be requested again
+        pfs_routes_cache.invalidate_route(routes[0].route)
+        request_routes()
+        assert patched.call_count == 2
+
+        chain_state.block_number = BlockNumber(chain_state.block_number + 1)
+        request_routes()
+        assert patched.call_count == 3
+
+
 def test_routing_mocked_pfs_happy_path_with_updated_iou(
     happy_path_fixture, one_to_n_address, our_address
 ):
@@ -532,6 +595,35 @@ def test_get_and_update_iou(one_to_n_address):
     assert new_iou_2.signature is not None
 
 
+def test_get_last_iou_reuses_request_signature():
+    """ Requests done in the same second reuse the signature of the first one """
+    sender = privatekey_to_address(PRIVKEY)
+    request_args = dict(
+        url="url",
+        token_network_address=factories.UNIT_TOKEN_NETWORK_ADDRESS,
+        sender=sender,
+        receiver=factories.make_address(),
+        privkey=PRIVKEY,
+    )
+    response = mocked_json_response(response_data={"last_iou": None})
+
+    pathfinding.last_iou_request_cache.clear()
+    try:
+        with patch.object(pathfinding, "datetime") as mocked_datetime:
+            mocked_datetime.utcnow.return_value = datetime(2020, 1, 1)
+            with patch.object(LocalSigner, "sign", return_value=bytes(65)) as mocked_sign:
+                with patch.object(session, "get", return_value=response):
+                    assert get_last_iou(**request_args) is None
+                    assert get_last_iou(**request_args) is None
+
+        assert mocked_sign.call_count == 1
+        assert len(pathfinding.last_iou_request_cache) == 1
+        for key in pathfinding.last_iou_request_cache.keys():
+            assert PRIVKEY not in key
+    finally:
+        pathfinding.last_iou_request_cache.clear()
+
+
 def test_get_pfs_iou(one_to_n_address):
     token_network_address = TokenNetworkAddress(bytes([1] * 20))
     privkey = bytes([2] * 32)
@@ -696,6 +788,55 @@ def test_routing_in_direct_channel(happy_path_fixture, our_address, one_to_n_add
         assert pfs_request.called
 
 
+def test_routing_skips_unusable_preferred_channel(
+    chain_state, token_network_state, our_address, one_to_n_address
+):
+    partner = factories.make_address()
+    routes = [
+        factories.RouteProperties(
+            address1=our_address, address2=partner, capacity1to2=TokenAmount(10)
+        ),
+        factories.RouteProperties(
+            address1=our_address, address2=partner, capacity1to2=TokenAmount(50)
+        ),
+    ]
+    token_network_state, channels = factories.create_network(
+        token_network_state=token_network_state,
+        our_address=our_address,
+        routes=routes,
+        block_number=factories.make_block_number(),
+    )
+    small_channel, big_channel = channels
+
+    # The preferred channel is only a hint, it can be out of date
+    preferred_channels = token_network_state.partneraddresses_to_preferred_channelidentifier
+    preferred_channels[partner] = small_channel.identifier
+
+    is_usable = channel.is_channel_usable_for_new_transfer
+    with patch("raiden.routing.get_best_routes_pfs") as pfs_request:
+        with patch.object(
+            channel, "is_channel_usable_for_new_transfer", side_effect=is_usable
+        ) as usable_check:
+            _, routes, _ = get_best_routes(
+                chain_state=chain_state,
+                token_network_address=token_network_state.address,
+                one_to_n_address=one_to_n_address,
+                from_address=our_address,
+                to_address=partner,
+                amount=PaymentAmount(50),
+                previous_address=None,
+                pfs_config=PFS_CONFIG,
+                privkey=PRIVKEY,
+            )
+
+    assert len(routes) == 1
+    assert routes[0].route == [our_address, partner]
+    assert not pfs_request.called
+
+    checked_channels = [call_args[0][0].identifier for call_args in usable_check.call_args_list]
+    assert checked_channels == [small_channel.identifier, big_channel.identifier]
+
+
 @pytest.fixture
 def query_paths_args(
     chain_id, token_network_state, one_to_n_address, our_address
@@ -717,7 +858,7 @@ def query_paths_args(
 
 @pytest.fixture
 def valid_response_json():
-    return dict(result="some result", feedback_token=DEFAULT_FEEDBACK_TOKEN.hex)
+    return dict(result=[], feedback_token=DEFAULT_FEEDBACK_TOKEN.hex)
 
 
 def test_query_paths_with_second_try(query_paths_args, valid_response_json):
@@ -891,7 +1032,7 @@ def test_no_iou_when_pfs_price_0(query_paths_args):
             token_network_registry_address=factories.make_token_network_registry_address(),
             user_deposit_address=factories.make_address(),
             payment_address=factories.make_address(),
-            confirmed_block_number=dict(number=BlockNumber(1)),
+            confirmed_block_number=BlockNumber(1),
             message="",
             operator="",
             version="",
@@ -962,3 +1103,182 @@ def mocked_json_response_with_sleep(**kwargs):  # pylint: disable=unused-argumen
                 # the other. If semaphore in raiden.network.pathfinding is bound to 2,
                 # the test fails
                 assert duration >= 0.4
+
+
+def test_query_paths_skips_pfs_info_when_block_is_confirmed(query_paths_args):
+    """ The last known confirmed block of the PFS is enough, no need to ask again """
+    assert PFS_CONFIG.info.confirmed_block_number >= query_paths_args["pfs_wait_for_block"]
+
+    with patch.object(pathfinding, "get_pfs_info") as mocked_pfs_info:
+        with patch.object(pathfinding, "create_current_iou"):
+            with patch.object(pathfinding, "post_pfs_paths", return_value=([], None)):
+                query_paths(**query_paths_args)
+
+    assert not mocked_pfs_info.called
+
+
+def test_query_paths_waits_for_pfs_block(query_paths_args):
+    """ The PFS info is polled until the PFS has confirmed the requested block """
+    confirmed_block_number = PFS_CONFIG.info.confirmed_block_number
+    query_paths_args["pfs_wait_for_block"] = BlockNumber(confirmed_block_number + 2)
+    pfs_infos = [
+        replace(PFS_CONFIG.info, confirmed_block_number=BlockNumber(confirmed_block_number + 1)),
+        replace(PFS_CONFIG.info, confirmed_block_number=BlockNumber(confirmed_block_number + 2)),
+    ]
+
+    with patch.object(pathfinding, "get_pfs_info", side_effect=pfs_infos) as mocked_pfs_info:
+        with patch.object(pathfinding.gevent, "sleep") as mocked_sleep:
+            with patch.object(pathfinding, "create_current_iou"):
+                with patch.object(
+                    pathfinding, "post_pfs_paths", return_value=([], None)
+                ) as mocked_post_paths:
+                    query_paths(**query_paths_args)
+
+    assert mocked_pfs_info.call_count == 2
+    assert mocked_sleep.call_count == 1
+    assert mocked_post_paths.call_count == 1
+
+
+def test_query_paths_batch_keeps_request_order(query_paths_args):
+    path_requests = [
+        PFSRequest(
+            token_network_address=query_paths_args["token_network_address"],
+            one_to_n_address=query_paths_args["one_to_n_address"],
+            route_from=query_paths_args["route_from"],
+            route_to=factories.make_address(),
+            value=PaymentAmount(value),
+            pfs_wait_for_block=query_paths_args["pfs_wait_for_block"],
+        )
+        for value in (30, 10, 20)
+    ]
+
+    def mocked_query_paths(value, **kwargs):  # pylint: disable=unused-argument
+        # Answer the biggest payments last
+        gevent.sleep(value / 1000)
+        return [{"value": value}], None
+
+    with patch.object(pathfinding, "query_paths", side_effect=mocked_query_paths) as patched:
+        results = query_paths_batch(
+            pfs_config=query_paths_args["pfs_config"],
+            our_address=query_paths_args["our_address"],
+            privkey=query_paths_args["privkey"],
+            current_block_number=query_paths_args["current_block_number"],
+            chain_id=query_paths_args["chain_id"],
+            path_requests=path_requests,
+        )
+
+    assert patched.call_count == 3
+    assert [routes[0]["value"] for routes, _ in results] == [30, 10, 20]
+
+
+def test_query_paths_batch_only_overlaps_waiting_for_pfs(query_paths_args):
+    """ Waiting for the PFS block overlaps, the IOU and /paths requests don't. """
+    pfs_wait_for_block = BlockNumber(PFS_CONFIG.info.confirmed_block_number + 1)
+    path_requests = [
+        PFSRequest(
+            token_network_address=query_paths_args["token_network_address"],
+            one_to_n_address=query_paths_args["one_to_n_address"],
+            route_from=query_paths_args["route_from"],
+            route_to=factories.make_address(),
+            value=PaymentAmount(50),
+            pfs_wait_for_block=pfs_wait_for_block,
+        )
+        for _ in range(2)
+    ]
+
+    def mocked_pfs_info_with_sleep(url):  # pylint: disable=unused-argument
+        gevent.sleep(0.2)
+        return replace(PFS_CONFIG.info, confirmed_block_number=pfs_wait_for_block)
+
+    def mocked_json_response_with_sleep(**kwargs):  # pylint: disable=unused-argument
+        gevent.sleep(0.2)
+        return [], None
+
+    with patch.object(pathfinding, "get_pfs_info", side_effect=mocked_pfs_info_with_sleep):
+        with patch.object(pathfinding, "create_current_iou"):
+            with patch.object(
+                pathfinding, "post_pfs_paths", side_effect=mocked_json_response_with_sleep
+            ):
+                before = time.monotonic()
+                query_paths_batch(
+                    pfs_config=query_paths_args["pfs_config"],
+                    our_address=query_paths_args["our_address"],
+                    privkey=query_paths_args["privkey"],
+                    current_block_number=query_paths_args["current_block_number"],
+                    chain_id=query_paths_args["chain_id"],
+                    path_requests=path_requests,
+                )
+                duration = time.monotonic() - before
+
+    # 0.2s of waiting for the PFS in parallel, then 2 * 0.2s of serialized
+    # /paths requests. Doing everything sequentially would take 0.8s.
+    assert 0.6 <= duration < 0.8
+
+
+def test_query_paths_batch_stops_remaining_requests_on_failure(query_paths_args):
+    path_requests = [
+        PFSRequest(
+            token_network_address=query_paths_args["token_network_address"],
+            one_to_n_address=query_paths_args["one_to_n_address"],
+            route_from=query_paths_args["route_from"],
+            route_to=factories.make_address(),
+            value=PaymentAmount(value),
+            pfs_wait_for_block=query_paths_args["pfs_wait_for_block"],
+        )
+        for value in (10, 20)
+    ]
+    finished = []
+
+    def mocked_query_paths(value, **kwargs):  # pylint: disable=unused-argument
+        if value == 10:
+            raise ServiceRequestFailed("PFS not reachable")
+        gevent.sleep(0.2)
+        finished.append(value)
+        return [], None
+
+    with patch.object(pathfinding, "query_paths", side_effect=mocked_query_paths):
+        with pytest.raises(ServiceRequestFailed):
+            query_paths_batch(
+                pfs_config=query_paths_args["pfs_config"],
+                our_address=query_paths_args["our_address"],
+                privkey=query_paths_args["privkey"],
+                current_block_number=query_paths_args["current_block_number"],
+                chain_id=query_paths_args["chain_id"],
+                path_requests=path_requests,
+            )
+        gevent.sleep(0.3)
+
+    assert not finished
+
+
+def test_post_pfs_paths_returns_canonical_addresses():
+    path = [factories.make_address() for _ in range(3)]
+    response = mocked_json_response(
+        response_data={
+            "result": [{"path": [to_checksum_address(node) for node in path], "estimated_fee": 0}],
+            "feedback_token": DEFAULT_FEEDBACK_TOKEN.hex,
+        }
+    )
+
+    with patch.object(session, "post", return_value=response):
+        result, feedback_token = post_pfs_paths(
+            url="abc", token_network_address=factories.make_token_network_address(), payload={}
+        )
+    assert result[0]["path"] == path
+    assert feedback_token == DEFAULT_FEEDBACK_TOKEN
+
+    # bytes.fromhex ignores whitespace, which must not result in a short address
+    for invalid_address in ("0xinvalid", "0x" + "ab" * 9 + " " + "ab" * 10 + " "):
+        response = mocked_json_response(
+            response_data={
+                "result": [{"path": [invalid_address], "estimated_fee": 0}],
+                "feedback_token": DEFAULT_FEEDBACK_TOKEN.hex,
+            }
+        )
+        with patch.object(session, "post", return_value=response):
+            with pytest.raises(ServiceRequestFailed):
+                post_pfs_paths(
+                    url="abc",
+                    token_network_address=factories.make_token_network_address(),
+                    payload={},
+                )
@@ -21,11 +21,12 @@
 from raiden.tests.utils.mocks import make_raiden_service_mock
 from raiden.transfer.events import ContractSendChannelBatchUnlock, EventPaymentSentSuccess
 from raiden.transfer.mediated_transfer.events import EventRouteFailed
-from raiden.transfer.state import ChainState
+from raiden.transfer.state import ChainState, RouteState
 from raiden.transfer.utils import hash_balance_data
 from raiden.transfer.views import get_channelstate_by_token_network_and_partner, state_from_raiden
 from raiden.utils.typing import (
     Address,
+    BlockNumber,
     ChannelID,
     List,
     LockedAmount,
@@ -189,6 +190,31 @@ def test_pfs_handler_handle_routefailed_with_feedback_token():
     )
 
 
+def test_pfs_handler_handle_routefailed_drops_cached_routes():
+    raiden, pfs_handler, _, token_network_address, route, _ = setup_pfs_handler_test(
+        set_feedback_token=True
+    )
+
+    cache_key = (token_network_address, route[0], route[-1], None, PaymentAmount(10))
+    raiden.pfs_routes_cache.set(cache_key, BlockNumber(1), [RouteState(route=route)])
+
+    route_failed_event = EventRouteFailed(
+        secrethash=make_secret_hash(), route=route, token_network_address=token_network_address
+    )
+
+    with patch("raiden.raiden_event_handler.post_pfs_feedback") as pfs_feedback_handler:
+        pfs_handler.on_raiden_events(
+            raiden=raiden,
+            chain_state=cast(ChainState, raiden.wal.get_current_state()),  # type: ignore
+            events=[route_failed_event],
+        )
+    assert pfs_feedback_handler.call_count == 1
+    assert raiden.pfs_routes_cache.get(cache_key, BlockNumber(1)) is None
+
+    # The feedback token of a route is only used once
+    assert tuple(route) not in raiden.route_to_feedback_token
+
+
 def test_pfs_handler_handle_routefailed_without_feedback_token():
     raiden, pfs_handler, _, token_network_address, route, _ = setup_pfs_handler_test(
         set_feedback_token=False
@@ -1,4 +1,5 @@
 import random
+from dataclasses import replace
 from hashlib import sha256
 
 import pytest
@@ -96,6 +97,109 @@ def test_contract_receive_channelnew_must_be_idempotent(channel_properties):
     assert channel_state1.identifier in partner_channels_ids, msg
 
 
+def test_contract_receive_channelnew_updates_latest_channel_opened_at(channel_properties):
+    block_hash = factories.make_block_hash()
+    token_network_state = TokenNetworkState(
+        address=factories.make_address(), token_address=factories.make_address()
+    )
+    assert token_network_state.latest_channel_opened_at == 0
+
+    properties, _ = channel_properties
+    for opened_at in (20, 10):
+        channel_state = factories.create(
+            replace(
+                properties,
+                canonical_identifier=factories.make_canonical_identifier(
+                    token_network_address=token_network_state.address
+                ),
+                open_transaction=factories.SuccessfulTransactionStateProperties(
+                    finished_block_number=opened_at
+                ),
+            )
+        )
+        state_change = ContractReceiveChannelNew(
+            transaction_hash=factories.make_transaction_hash(),
+            channel_state=channel_state,
+            block_number=opened_at,
+            block_hash=block_hash,
+        )
+        token_network.state_transition(
+            token_network_state=token_network_state,
+            state_change=state_change,
+            block_number=opened_at,
+            block_hash=block_hash,
+            pseudo_random_generator=random.Random(),
+        )
+
+    assert token_network_state.latest_channel_opened_at == 20
+
+    restored_state = TokenNetworkState(
+        address=token_network_state.address,
+        token_address=token_network_state.token_address,
+        channelidentifiers_to_channels=token_network_state.channelidentifiers_to_channels,
+    )
+    assert restored_state.latest_channel_opened_at == 20
+
+
+def test_preferred_channel_is_tracked_per_partner(channel_properties):
+    block_number = 10
+    block_hash = factories.make_block_hash()
+    token_network_state = TokenNetworkState(
+        address=factories.make_address(), token_address=factories.make_address()
+    )
+
+    properties, _ = channel_properties
+    small_channel, big_channel = [
+        factories.create(
+            replace(
+                properties,
+                our_state=replace(properties.our_state, balance=balance),
+                canonical_identifier=factories.make_canonical_identifier(
+                    token_network_address=token_network_state.address
+                ),
+            )
+        )
+        for balance in (10, 100)
+    ]
+    partner_address = small_channel.partner_state.address
+    preferred_channels = token_network_state.partneraddresses_to_preferred_channelidentifier
+
+    for channel_state in (small_channel, big_channel):
+        token_network.state_transition(
+            token_network_state=token_network_state,
+            state_change=ContractReceiveChannelNew(
+                transaction_hash=factories.make_transaction_hash(),
+                channel_state=channel_state,
+                block_number=block_number,
+                block_hash=block_hash,
+            ),
+            block_number=block_number,
+            block_hash=block_hash,
+            pseudo_random_generator=random.Random(),
+        )
+    assert preferred_channels[partner_address] == big_channel.identifier
+
+    for channel_state in (big_channel, small_channel):
+        token_network.state_transition(
+            token_network_state=token_network_state,
+            state_change=ContractReceiveChannelClosed(
+                transaction_hash=factories.make_transaction_hash(),
+                transaction_from=partner_address,
+                canonical_identifier=channel_state.canonical_identifier,
+                block_number=block_number + 1,
+                block_hash=block_hash,
+            ),
+            block_number=block_number + 1,
+            block_hash=block_hash,
+            pseudo_random_generator=random.Random(),
+        )
+
+        if channel_state is big_channel:
+            assert preferred_channels[partner_address] == small_channel.identifier
+
+    assert partner_address not in preferred_channels
+
+
 def test_channel_settle_must_properly_cleanup(channel_properties):
     open_block_number = 10
     open_block_hash = factories.make_block_hash()
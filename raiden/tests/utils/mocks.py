@@ -4,6 +4,7 @@
 from unittest.mock import Mock, PropertyMock
 
 from raiden.constants import Environment, RoutingMode
+from raiden.routing import PFSRoutesCache
 from raiden.settings import RaidenConfig
 from raiden.storage.serialization import JSONSerializer
 from raiden.storage.sqlite import SerializedSQLiteStorage
@@ -192,6 +193,7 @@ def __init__(self, message_handler=None, state_transition=None, private_key=None
 
         self.targets_to_identifiers_to_statuses: Dict[Address, dict] = defaultdict(dict)
         self.route_to_feedback_token: dict = {}
+        self.pfs_routes_cache = PFSRoutesCache()
 
         if state_transition is None:
             state_transition = node.state_transition
@@ -450,6 +450,15 @@ class TokenNetworkState(State):
     partneraddresses_to_channelidentifiers: Dict[Address, List[ChannelID]] = field(
         repr=False, default_factory=lambda: defaultdict(list)
     )
+    # Opened channel with the highest capacity per partner, tried first for
+    # direct transfers. Updated by the token network state transitions only,
+    # transfers change the balances too, so the channel may not be usable.
+    partneraddresses_to_preferred_channelidentifier: Dict[Address, ChannelID] = field(
+        repr=False, default_factory=dict
+    )
+    # Block at which the most recent channel of this token network was opened,
+    # updated on channel open so routing doesn't have to scan all channels.
+    latest_channel_opened_at: BlockNumber = field(default=BlockNumber(0))
 
     def __post_init__(self) -> None:
         typecheck(self.address, T_Address)
@@ -459,6 +468,18 @@ def __post_init__(self) -> None:
             list, self.partneraddresses_to_channelidentifiers
         )
 
+        # Snapshots taken before the field was introduced don't contain it
+        self.latest_channel_opened_at = max(
+            self.latest_channel_opened_at,
+            max(
+                (
+                    channel_state.open_transaction.finished_block_number
+                    for channel_state in self.channelidentifiers_to_channels.values()
+                ),
+                default=BlockNumber(0),
+            ),
+        )
+
 
 @dataclass
 class TokenNetworkRegistryState(State):
@@ -2,7 +2,7 @@
 
 from raiden.transfer import channel
 from raiden.transfer.architecture import Event, StateChange, TransitionResult
-from raiden.transfer.state import TokenNetworkState
+from raiden.transfer.state import ChannelState, TokenNetworkState
 from raiden.transfer.state_change import (
     ActionChannelClose,
     ActionChannelSetRevealTimeout,
@@ -18,7 +18,7 @@
     ReceiveWithdrawExpired,
     ReceiveWithdrawRequest,
 )
-from raiden.utils.typing import MYPY_ANNOTATION, BlockHash, BlockNumber, List, Union
+from raiden.utils.typing import MYPY_ANNOTATION, Address, BlockHash, BlockNumber, List, Union
 
 # TODO: The proper solution would be to introduce a marker for state changes
 # that contains channel IDs and other specific channel attributes
@@ -37,6 +37,37 @@
 ]
 
 
+def update_preferred_channel(
+    token_network_state: TokenNetworkState, partner_address: Address
+) -> None:
+    """ Track the opened channel with the highest capacity to `partner_address`.
+
+    This is only a hint for routing, the capacity also changes with transfers which are
+    not handled here.
+    """
+    best_channel = None
+    best_distributable = -1
+    for channel_identifier in token_network_state.partneraddresses_to_channelidentifiers.get(
+        partner_address, []
+    ):
+        channel_state = token_network_state.channelidentifiers_to_channels[channel_identifier]
+        if channel.get_status(channel_state) != ChannelState.STATE_OPENED:
+            continue
+
+        distributable = channel.get_distributable(
+            channel_state.our_state, channel_state.partner_state
+        )
+        if distributable > best_distributable:
+            best_channel = channel_state
+            best_distributable = distributable
+
+    preferred_channels = token_network_state.partneraddresses_to_preferred_channelidentifier
+    if best_channel is not None:
+        preferred_channels[partner_address] = best_channel.identifier
+    else:
+        preferred_channels.pop(partner_address, None)
+
+
 def subdispatch_to_channel_by_id(
     token_network_state: TokenNetworkState,
     state_change: StateChangeWithChannelID,
@@ -70,6 +101,7 @@ def subdispatch_to_channel_by_id(
         else:
             ids_to_channels[channel_identifier] = result.new_state
 
+        update_preferred_channel(token_network_state, channel_state.partner_state.address)
         events.extend(result.events)
 
     return TransitionResult(token_network_state, events)
@@ -140,6 +172,11 @@ def handle_channelnew(
         token_network_state.channelidentifiers_to_channels[channel_identifier] = channel_state
         addresses_to_ids = token_network_state.partneraddresses_to_channelidentifiers
         addresses_to_ids[partner_address].append(channel_identifier)
+        token_network_state.latest_channel_opened_at = max(
+            token_network_state.latest_channel_opened_at,
+            channel_state.open_transaction.finished_block_number,
+        )
+        update_preferred_channel(token_network_state, partner_address)
 
     return TransitionResult(token_network_state, events)
 
@@ -252,6 +289,7 @@ def handle_batch_unlock(
             ].remove(channel_state.identifier)
 
             del token_network_state.channelidentifiers_to_channels[channel_state.identifier]
+            update_preferred_channel(token_network_state, channel_state.partner_state.address)
 
     return TransitionResult(token_network_state, events)
 
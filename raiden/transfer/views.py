@@ -262,13 +262,24 @@ def get_channelstate_by_token_network_and_partner(
 
     channel_state = None
     if token_network:
-        channels = [
-            token_network.channelidentifiers_to_channels[channel_id]
-            for channel_id in token_network.partneraddresses_to_channelidentifiers[partner_address]
-        ]
-        states = filter_channels_by_status(channels, [ChannelState.STATE_UNUSABLE])
-        if states:
-            channel_state = states[-1]
+        channel_state = get_channelstate_by_partner(token_network, partner_address)
+
+    return channel_state
+
+
+def get_channelstate_by_partner(
+    token_network: TokenNetworkState, partner_address: Address
+) -> Optional[NettingChannelState]:
+    """ Return the NettingChannelState if it exists, None otherwise. """
+    channels = [
+        token_network.channelidentifiers_to_channels[channel_id]
+        for channel_id in token_network.partneraddresses_to_channelidentifiers[partner_address]
+    ]
+    states = filter_channels_by_status(channels, [ChannelState.STATE_UNUSABLE])
+
+    channel_state = None
+    if states:
+        channel_state = states[-1]
 
     return channel_state
 